@@ -1,7 +1,7 @@
 import os
 import re
 import base64
-import requests
+import functools
 import time
 from django.db.models import Avg
 from django.shortcuts import get_object_or_404
@@ -11,6 +11,7 @@ from pydantic import BaseModel, Field, field_validator
 from typing import List, Optional
 
 from backend.core.models import Flashcard, FlashcardStudy, StudySession
+from backend.core.profiling import outbound
 
 api = NinjaAPI(
     title="JIT Learning",
@@ -22,6 +23,15 @@ v1 = Router()
 api.add_router("/v1", v1)
 
 
+@functools.cache
+def http_session():
+    # requests is only needed for outbound calls, so defer importing it and
+    # share one session so connections to the same host are pooled
+    import requests
+
+    return requests.Session()
+
+
 class FlashCard(BaseModel):
     question: str
     answer: str
@@ -83,30 +93,34 @@ def extract_content_from_pdf(pdf_base64):
     files = {"file": ("document.pdf", pdf_bytes, "application/pdf")}
     headers = {"Authorization": f"Bearer {llama_api_key}", "accept": "application/json"}
 
-    response = requests.post(upload_url, headers=headers, files=files)
-    response.raise_for_status()
-    response_json = response.json()
-    print(f"{response_json = }")
-    job_id = response_json["id"]
-
-    # Check job status until complete
-    status_url = f"https://api.cloud.llamaindex.ai/api/parsing/job/{job_id}"
-    while True:
-        status_response = requests.get(status_url, headers=headers)
-        status_response.raise_for_status()
-        status = status_response.json()["status"]
-        print(f"{status = }")
-        if status == "SUCCESS":
-            break
-        elif status in ["FAILED", "CANCELLED"]:
-            raise Exception(f"PDF parsing failed with status: {status}")
-        time.sleep(3)  # Wait before checking again
+    session = http_session()
+
+    # the span covers the polling waits too, since they're time spent on the parsing api
+    with outbound("extract_content_from_pdf", upload_url):
+        response = session.post(upload_url, headers=headers, files=files)
+        response.raise_for_status()
+        response_json = response.json()
+        print(f"{response_json = }")
+        job_id = response_json["id"]
+
+        # Check job status until complete
+        status_url = f"https://api.cloud.llamaindex.ai/api/parsing/job/{job_id}"
+        while True:
+            status_response = session.get(status_url, headers=headers)
+            status_response.raise_for_status()
+            status = status_response.json()["status"]
+            print(f"{status = }")
+            if status == "SUCCESS":
+                break
+            elif status in ["FAILED", "CANCELLED"]:
+                raise Exception(f"PDF parsing failed with status: {status}")
+            time.sleep(3)  # Wait before checking again
         
 
-    # Get results in Text
-    result_url = f"https://api.cloud.llamaindex.ai/api/parsing/job/{job_id}/result/text"
-    result_response = requests.get(result_url, headers=headers)
-    result_response.raise_for_status()
+        # Get results in Text
+        result_url = f"https://api.cloud.llamaindex.ai/api/parsing/job/{job_id}/result/text"
+        result_response = session.get(result_url, headers=headers)
+        result_response.raise_for_status()
 
     return result_response.text
 
@@ -155,7 +169,8 @@ def generate_flashcards(
         ],
     }
 
-    response = requests.post(url, headers=headers, json=payload)
+    with outbound("generate_flashcards", url):
+        response = http_session().post(url, headers=headers, json=payload)
     response.raise_for_status()  # This will raise an exception for HTTP errors
 
     # Parse the JSON response
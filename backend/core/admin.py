@@ -1,6 +1,14 @@
+import json
+
 from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
 
-from .models import User
+from .models import RequestProfile, User
+from .profiling import to_pstats, to_speedscope
 
 
 @admin.register(User)
@@ -13,3 +21,78 @@ class UserAdmin(admin.ModelAdmin):
         "is_staff",
         "is_active",
     ]
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = [
+        "created_at",
+        "method",
+        "path",
+        "status_code",
+        "trigger",
+        "duration_ms",
+        "cpu_ms",
+        "sql_count",
+        "sql_ms",
+        "duplicate_sql_count",
+        "outbound_ms",
+    ]
+    list_filter = ["trigger", "method", "status_code"]
+    search_fields = ["path"]
+    exclude = ["stacks"]
+    readonly_fields = ["exports"]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                "<uuid:pk>/speedscope/",
+                self.admin_site.admin_view(self.speedscope_view),
+                name="core_requestprofile_speedscope",
+            ),
+            path(
+                "<uuid:pk>/pstats/",
+                self.admin_site.admin_view(self.pstats_view),
+                name="core_requestprofile_pstats",
+            ),
+        ] + super().get_urls()
+
+    @admin.display(description="Export")
+    def exports(self, obj):
+        if not obj.stacks.get("stacks"):
+            return "no CPU samples"
+        return format_html(
+            '<a href="{}">speedscope</a> / <a href="{}">pstats</a>',
+            reverse("admin:core_requestprofile_speedscope", args=[obj.pk]),
+            reverse("admin:core_requestprofile_pstats", args=[obj.pk]),
+        )
+
+    def speedscope_view(self, request, pk):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        profile = get_object_or_404(RequestProfile, pk=pk)
+        if not profile.stacks.get("stacks"):
+            raise Http404("profile has no CPU samples")
+        response = HttpResponse(
+            json.dumps(to_speedscope(profile)), content_type="application/json"
+        )
+        response["Content-Disposition"] = f'attachment; filename="{pk}.speedscope.json"'
+        return response
+
+    def pstats_view(self, request, pk):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        profile = get_object_or_404(RequestProfile, pk=pk)
+        if not profile.stacks.get("stacks"):
+            raise Http404("profile has no CPU samples")
+        response = HttpResponse(
+            to_pstats(profile), content_type="application/octet-stream"
+        )
+        response["Content-Disposition"] = f'attachment; filename="{pk}.pstats"'
+        return response
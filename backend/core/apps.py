@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "backend.core"
+
+    def ready(self):
+        from .startup import init_sentry
+
+        init_sentry()
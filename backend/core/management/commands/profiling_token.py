@@ -0,0 +1,22 @@
+from decouple import config
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.core.profiling import PROFILE_HEADER, make_token
+
+
+class Command(BaseCommand):
+    help = "Print a signed header value that enables profiling for a request"
+
+    def handle(self, *args, **options):
+        # without a fixed secret key every process signs with its own random key,
+        # so the workers would reject the token
+        if not config("SECRET_KEY", default=""):
+            raise CommandError(
+                "SECRET_KEY must be set in the environment or .env to the value the server uses"
+            )
+
+        self.stdout.write(f"{PROFILE_HEADER}: {make_token()}")
+        self.stderr.write(
+            f"valid for {settings.PROFILING_TOKEN_MAX_AGE} seconds on paths under {settings.PROFILING_PATH_PREFIX}"
+        )
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.1 on 2026-10-18 12:00
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_flashcard_studysession_flashcardstudy_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('method', models.CharField(max_length=10)),
+                ('path', models.CharField(max_length=2048)),
+                ('status_code', models.IntegerField()),
+                ('trigger', models.CharField(choices=[('header', 'Signed Header'), ('sample', 'Sampled')], max_length=10)),
+                ('duration_ms', models.FloatField()),
+                ('cpu_ms', models.FloatField()),
+                ('sql_count', models.IntegerField()),
+                ('sql_ms', models.FloatField()),
+                ('duplicate_sql_count', models.IntegerField()),
+                ('outbound_ms', models.FloatField()),
+                ('sampling_interval_ms', models.FloatField()),
+                ('queries', models.JSONField(default=list)),
+                ('duplicates', models.JSONField(default=list)),
+                ('outbound', models.JSONField(default=list)),
+                ('stacks', models.JSONField(default=dict)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
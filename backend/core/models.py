@@ -33,3 +33,31 @@ class FlashcardStudy(models.Model):
     study_session = models.ForeignKey(StudySession, on_delete=models.CASCADE, related_name='card_studies')
     knowledge_level = models.IntegerField(choices=[(1, 'Well Known'), (2, 'Somewhat Known'), (3, 'Not Known')])
     studied_at = models.DateTimeField(auto_now_add=True)
+
+class RequestProfile(models.Model):
+    class Meta:
+        ordering = ['-created_at']
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=2048)
+    status_code = models.IntegerField()
+    trigger = models.CharField(max_length=10, choices=[('header', 'Signed Header'), ('sample', 'Sampled')])
+    duration_ms = models.FloatField()
+    cpu_ms = models.FloatField()
+    sql_count = models.IntegerField()
+    sql_ms = models.FloatField()
+    duplicate_sql_count = models.IntegerField()
+    outbound_ms = models.FloatField()
+    sampling_interval_ms = models.FloatField()
+    queries = models.JSONField(default=list)
+    duplicates = models.JSONField(default=list)
+    outbound = models.JSONField(default=list)
+    stacks = models.JSONField(default=dict)
+
+    @classmethod
+    def trim(cls, size):
+        # keep only the newest profiles so the table behaves like a ring buffer
+        stale = cls.objects.values_list('pk', flat=True)[size:]
+        cls.objects.filter(pk__in=list(stale)).delete()
@@ -0,0 +1,333 @@
+"""
+Opt-in request profiling.
+
+A request is profiled when it carries a valid signed ``X-Profile-Request`` header
+(see ``manage.py profiling_token``) or is picked by ``PROFILING_SAMPLE_RATE``.
+Profiled requests record a statistical CPU profile, every SQL statement and the
+time spent in outbound calls, and are stored as ``RequestProfile`` rows, of which
+only the newest ``PROFILING_BUFFER_SIZE`` are kept.
+"""
+
+import collections
+import contextlib
+import contextvars
+import itertools
+import logging
+import marshal
+import random
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile-Request"
+TOKEN_SALT = "backend.core.profiling"
+
+_current = contextvars.ContextVar("request_profile", default=None)
+
+
+def make_token():
+    return signing.dumps("profile", salt=TOKEN_SALT)
+
+
+def has_valid_token(request):
+    token = request.headers.get(PROFILE_HEADER)
+    if not token:
+        return False
+    try:
+        signing.loads(token, salt=TOKEN_SALT, max_age=settings.PROFILING_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return True
+
+
+@contextlib.contextmanager
+def outbound(name, url):
+    """Record the time spent in an outbound call on the profile of the current request, if any."""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.outbound.append(
+            {
+                "name": name,
+                "url": url,
+                "duration_ms": (time.perf_counter() - start) * 1000,
+            }
+        )
+
+
+class StackSampler(threading.Thread):
+    """
+    Periodically records the call stack of another thread while it uses the CPU.
+
+    A stack is only recorded when the thread's CPU clock has advanced since the
+    previous sample, so time spent sleeping or blocked on I/O isn't counted.
+    Where per-thread CPU clocks aren't available every sample is recorded,
+    which makes it a wall-clock profile.
+    """
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self._stopped = threading.Event()
+        try:
+            self._clock_id = time.pthread_getcpuclockid(thread_id)
+        except (AttributeError, OSError):
+            self._clock_id = None
+        self._cpu_time = self._thread_cpu_time()
+
+    def _thread_cpu_time(self):
+        if self._clock_id is None:
+            return None
+        return time.clock_gettime(self._clock_id)
+
+    def run(self):
+        # sample as soon as the thread starts, so requests shorter than one
+        # interval still get a profile
+        self.sample()
+        while not self._stopped.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        cpu_time = self._thread_cpu_time()
+        if cpu_time is not None and cpu_time == self._cpu_time:
+            return
+        self._cpu_time = cpu_time
+
+        frame = sys._current_frames().get(self.thread_id)
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+            frame = frame.f_back
+        if stack:
+            self.stacks[tuple(reversed(stack))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+
+class QueryRecorder:
+    """
+    Database execute wrapper that records each statement and how long it took.
+
+    Every statement is counted, but only the first ``limit`` are kept, so a
+    request that runs thousands of queries doesn't produce a huge profile.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.queries = []
+        self.count = 0
+        self.duration_ms = 0.0
+        self._by_sql = collections.defaultdict(lambda: [0, 0.0])
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration_ms = (time.perf_counter() - start) * 1000
+            self.count += 1
+            self.duration_ms += duration_ms
+            totals = self._by_sql[sql]
+            totals[0] += 1
+            totals[1] += duration_ms
+            if len(self.queries) < self.limit:
+                self.queries.append(
+                    {
+                        "sql": sql,
+                        "alias": context["connection"].alias,
+                        "many": many,
+                        "duration_ms": duration_ms,
+                    }
+                )
+
+    def duplicates(self):
+        # statements are parametrized, so a repeated statement is usually an N+1 pattern
+        duplicates = sorted(
+            (
+                {"sql": sql, "count": count, "duration_ms": duration_ms}
+                for sql, (count, duration_ms) in self._by_sql.items()
+                if count > 1
+            ),
+            key=lambda duplicate: duplicate["count"],
+            reverse=True,
+        )
+        return duplicates[: self.limit]
+
+
+class Profile:
+    def __init__(self, trigger):
+        self.trigger = trigger
+        self.outbound = []
+        self.queries = QueryRecorder(settings.PROFILING_MAX_QUERIES)
+        self.sampler = StackSampler(
+            threading.get_ident(), settings.PROFILING_INTERVAL_MS / 1000
+        )
+
+    @contextlib.contextmanager
+    def record(self):
+        token = _current.set(self)
+        start, cpu_start = time.perf_counter(), time.thread_time()
+        self.sampler.start()
+        try:
+            with contextlib.ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(self.queries))
+                yield
+        finally:
+            self.sampler.stop()
+            self.duration_ms = (time.perf_counter() - start) * 1000
+            self.cpu_ms = (time.thread_time() - cpu_start) * 1000
+            _current.reset(token)
+
+    def stacks(self):
+        frames, index = [], {}
+        stacks = []
+        for stack, count in self.sampler.stacks.most_common():
+            indices = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    frames.append(list(frame))
+                indices.append(index[frame])
+            stacks.append([indices, count])
+        return {"frames": frames, "stacks": stacks}
+
+    def save(self, request, response):
+        from .models import RequestProfile
+
+        duplicates = self.queries.duplicates()
+        RequestProfile.objects.create(
+            method=request.method,
+            path=request.get_full_path()[:2048],
+            status_code=response.status_code,
+            trigger=self.trigger,
+            duration_ms=self.duration_ms,
+            cpu_ms=self.cpu_ms,
+            sql_count=self.queries.count,
+            sql_ms=self.queries.duration_ms,
+            duplicate_sql_count=sum(duplicate["count"] for duplicate in duplicates),
+            outbound_ms=sum(call["duration_ms"] for call in self.outbound),
+            sampling_interval_ms=settings.PROFILING_INTERVAL_MS,
+            queries=self.queries.queries,
+            duplicates=duplicates,
+            outbound=self.outbound,
+            stacks=self.stacks(),
+        )
+        RequestProfile.trim(settings.PROFILING_BUFFER_SIZE)
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not request.path.startswith(settings.PROFILING_PATH_PREFIX):
+            return self.get_response(request)
+
+        if has_valid_token(request):
+            trigger = "header"
+        elif random.random() < settings.PROFILING_SAMPLE_RATE:
+            trigger = "sample"
+        else:
+            return self.get_response(request)
+
+        profile = Profile(trigger)
+        with profile.record():
+            response = self.get_response(request)
+
+        # profiling must never change the response
+        try:
+            profile.save(request, response)
+        except Exception:
+            logger.exception(
+                "failed to save profile of %s %s", request.method, request.path
+            )
+
+        return response
+
+
+def to_speedscope(request_profile):
+    interval = request_profile.sampling_interval_ms
+    frames = request_profile.stacks.get("frames", [])
+    stacks = request_profile.stacks.get("stacks", [])
+    total = sum(count for _, count in stacks) * interval
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": f"{request_profile.method} {request_profile.path}",
+        "exporter": "backend.core.profiling",
+        "shared": {
+            "frames": [
+                {"name": name, "file": filename, "line": line}
+                for filename, line, name in frames
+            ]
+        },
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": f"{request_profile.method} {request_profile.path}",
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": total,
+                "samples": [indices for indices, _ in stacks],
+                "weights": [count * interval for _, count in stacks],
+            }
+        ],
+    }
+
+
+def to_pstats(request_profile):
+    """
+    Build a marshalled stats dict loadable with ``pstats.Stats``.
+
+    Timings are estimated from the samples, each counting as one interval of CPU
+    time, and call counts are sample counts, since a statistical profile doesn't
+    observe individual calls.
+    """
+    interval = request_profile.sampling_interval_ms / 1000
+    frames = [tuple(frame) for frame in request_profile.stacks.get("frames", [])]
+    stats = {}
+
+    def entry(function):
+        return stats.setdefault(function, [0, 0, 0.0, 0.0, {}])
+
+    for indices, count in request_profile.stacks.get("stacks", []):
+        stack = [frames[index] for index in indices]
+        elapsed = count * interval
+
+        leaf = entry(stack[-1])
+        leaf[2] += elapsed
+
+        for function in set(stack):
+            function_stats = entry(function)
+            function_stats[0] += count
+            function_stats[1] += count
+            function_stats[3] += elapsed
+
+        for caller, callee in set(itertools.pairwise(stack)):
+            callers = entry(callee)[4]
+            cc, nc, tt, ct = callers.get(caller, (0, 0, 0.0, 0.0))
+            callers[caller] = (cc + count, nc + count, tt, ct + elapsed)
+
+    return marshal.dumps(
+        {
+            function: (cc, nc, tt, ct, callers)
+            for function, (cc, nc, tt, ct, callers) in stats.items()
+        }
+    )
@@ -0,0 +1,50 @@
+import functools
+import logging
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+@functools.cache
+def init_sentry():
+    if not settings.SENTRY_DSN:
+        return
+
+    # importing the sdk happens here rather than in settings, and only the django
+    # integration is enabled so sentry doesn't probe for and import every library
+    # it has an integration for
+    import sentry_sdk
+    from sentry_sdk.integrations.django import DjangoIntegration
+
+    sentry_sdk.init(
+        dsn=settings.SENTRY_DSN,
+        integrations=[DjangoIntegration()],
+        auto_enabling_integrations=False,
+        auto_session_tracking=False,
+        traces_sample_rate=0,
+    )
+
+
+def warm_up():
+    """
+    Do the work Django otherwise defers to the first request, so it isn't paid by a user.
+
+    Called from the wsgi/asgi entrypoints when STARTUP_OPTIMIZED is enabled,
+    after the application is built and before the server starts accepting requests.
+    Only process-wide state is warmed; database and cache handles are per thread,
+    so opening them here wouldn't help the threads that serve requests.
+    """
+    init_sentry()
+
+    from django.urls import get_resolver
+
+    # imports the urlconf (and with it the api and its schemas) and builds the
+    # resolver's lookup tables, which are shared by every thread
+    _ = get_resolver().reverse_dict
+
+    from backend.api import http_session
+
+    http_session()
+
+    logger.info("worker warmed up")
@@ -0,0 +1,234 @@
+import os
+import pstats
+import tempfile
+import threading
+import time
+from io import StringIO
+from unittest import mock
+
+from django.core import signing
+from django.core.management import CommandError, call_command
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from .models import Flashcard, RequestProfile, StudySession, User
+from .profiling import (
+    PROFILE_HEADER,
+    QueryRecorder,
+    StackSampler,
+    has_valid_token,
+    make_token,
+    to_pstats,
+    to_speedscope,
+)
+
+STACKS = {
+    "frames": [
+        ["app.py", 1, "handler"],
+        ["app.py", 10, "query"],
+        ["app.py", 20, "render"],
+    ],
+    "stacks": [[[0, 1], 3], [[0, 2], 1], [[0], 2]],
+}
+
+
+def create_profile(**kwargs):
+    fields = {
+        "method": "GET",
+        "path": "/api/v1/example",
+        "status_code": 200,
+        "trigger": "header",
+        "duration_ms": 10.0,
+        "cpu_ms": 5.0,
+        "sql_count": 0,
+        "sql_ms": 0.0,
+        "duplicate_sql_count": 0,
+        "outbound_ms": 0.0,
+        "sampling_interval_ms": 5.0,
+        "stacks": STACKS,
+    }
+    fields.update(kwargs)
+    return RequestProfile.objects.create(**fields)
+
+
+class TokenTests(TestCase):
+    def request(self, token=None):
+        headers = {PROFILE_HEADER: token} if token else {}
+        return RequestFactory().get("/api/v1/example", headers=headers)
+
+    def test_valid_token(self):
+        self.assertTrue(has_valid_token(self.request(make_token())))
+
+    def test_missing_or_tampered_token(self):
+        self.assertFalse(has_valid_token(self.request()))
+        self.assertFalse(has_valid_token(self.request(make_token() + "x")))
+        self.assertFalse(
+            has_valid_token(self.request(signing.dumps("profile", salt="other")))
+        )
+
+    @override_settings(PROFILING_TOKEN_MAX_AGE=0)
+    def test_expired_token(self):
+        token = make_token()
+        time.sleep(1)
+        self.assertFalse(has_valid_token(self.request(token)))
+
+    def test_command_requires_secret_key(self):
+        with (
+            mock.patch.dict(os.environ, {"SECRET_KEY": ""}),
+            self.assertRaises(CommandError),
+        ):
+            call_command("profiling_token", stdout=StringIO(), stderr=StringIO())
+
+        stdout = StringIO()
+        with mock.patch.dict(os.environ, {"SECRET_KEY": "fixed"}):
+            call_command("profiling_token", stdout=stdout, stderr=StringIO())
+        self.assertTrue(stdout.getvalue().startswith(f"{PROFILE_HEADER}: "))
+
+
+class QueryRecorderTests(TestCase):
+    def run_queries(self, recorder, statements):
+        connection = mock.Mock(alias="default")
+        for sql in statements:
+            recorder(lambda *args: None, sql, (), False, {"connection": connection})
+
+    def test_duplicates(self):
+        recorder = QueryRecorder(limit=100)
+        self.run_queries(recorder, ["A", "B", "A", "C", "A", "B"])
+
+        duplicates = recorder.duplicates()
+        self.assertEqual(
+            [(duplicate["sql"], duplicate["count"]) for duplicate in duplicates],
+            [("A", 3), ("B", 2)],
+        )
+
+    def test_limit(self):
+        recorder = QueryRecorder(limit=2)
+        self.run_queries(recorder, ["A", "B", "A", "C", "A", "B"])
+
+        self.assertEqual(recorder.count, 6)
+        self.assertEqual([query["sql"] for query in recorder.queries], ["A", "B"])
+        self.assertEqual(recorder.duplicates()[0]["count"], 3)
+
+
+class StackSamplerTests(TestCase):
+    def test_idle_thread_is_not_sampled(self):
+        sampler = StackSampler(threading.get_ident(), 0.005)
+        sampler.start()
+        time.sleep(0.1)
+        sampler.stop()
+
+        # a wall-clock sampler would take about 20 samples; only the ones around
+        # starting and stopping the sampler, when the thread uses the CPU, count
+        self.assertLess(sum(sampler.stacks.values()), 5)
+
+
+class ExportTests(TestCase):
+    def test_speedscope(self):
+        speedscope = to_speedscope(create_profile())
+
+        profile = speedscope["profiles"][0]
+        self.assertEqual(len(speedscope["shared"]["frames"]), 3)
+        self.assertEqual(profile["samples"], [[0, 1], [0, 2], [0]])
+        self.assertEqual(profile["weights"], [15.0, 5.0, 10.0])
+        self.assertEqual(profile["endValue"], 30.0)
+
+    def test_pstats(self):
+        with tempfile.NamedTemporaryFile(suffix=".pstats") as file:
+            file.write(to_pstats(create_profile()))
+            file.flush()
+            stats = pstats.Stats(file.name).stats
+
+        _, nc, tt, ct, _ = stats[("app.py", 1, "handler")]
+        self.assertEqual(nc, 6)
+        self.assertAlmostEqual(tt, 0.01)
+        self.assertAlmostEqual(ct, 0.03)
+        self.assertIn(("app.py", 1, "handler"), stats[("app.py", 10, "query")][4])
+
+
+class RequestProfileTests(TestCase):
+    def test_trim(self):
+        for _ in range(5):
+            create_profile()
+
+        RequestProfile.trim(3)
+
+        self.assertEqual(RequestProfile.objects.count(), 3)
+
+
+class ProfilingMiddlewareTests(TestCase):
+    def setUp(self):
+        self.session = StudySession.objects.create()
+        Flashcard.objects.create(study_session=self.session, question="Q", answer="A")
+        self.url = f"/api/v1/get-next-flashcard/{self.session.id}"
+
+    def test_header_trigger(self):
+        response = self.client.get(self.url, headers={PROFILE_HEADER: make_token()})
+
+        self.assertEqual(response.status_code, 200)
+        profile = RequestProfile.objects.get()
+        self.assertEqual(profile.trigger, "header")
+        self.assertEqual(profile.path, self.url)
+        self.assertGreater(profile.sql_count, 0)
+
+    def test_unprofiled_request(self):
+        self.client.get(self.url)
+
+        self.assertFalse(RequestProfile.objects.exists())
+
+    @override_settings(PROFILING_SAMPLE_RATE=1.0)
+    def test_sample_trigger(self):
+        self.client.get(self.url)
+
+        self.assertEqual(RequestProfile.objects.get().trigger, "sample")
+
+    @override_settings(PROFILING_SAMPLE_RATE=1.0, PROFILING_BUFFER_SIZE=3)
+    def test_buffer_size(self):
+        for _ in range(5):
+            self.client.get(self.url)
+
+        self.assertEqual(RequestProfile.objects.count(), 3)
+
+    @override_settings(PROFILING_SAMPLE_RATE=1.0)
+    def test_failed_save_keeps_response(self):
+        with (
+            mock.patch.object(
+                RequestProfile.objects, "create", side_effect=RuntimeError
+            ),
+            self.assertLogs("backend.core.profiling", "ERROR"),
+        ):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["question"], "Q")
+
+
+class RequestProfileAdminTests(TestCase):
+    def setUp(self):
+        self.client.force_login(
+            User.objects.create_superuser("admin", "admin@example.com", "password")
+        )
+
+    def test_pages(self):
+        profile = create_profile()
+
+        for name, args in [
+            ("admin:core_requestprofile_changelist", []),
+            ("admin:core_requestprofile_change", [profile.pk]),
+            ("admin:core_requestprofile_speedscope", [profile.pk]),
+            ("admin:core_requestprofile_pstats", [profile.pk]),
+        ]:
+            with self.subTest(name):
+                response = self.client.get(reverse(name, args=args))
+                self.assertEqual(response.status_code, 200)
+
+    def test_empty_profile_exports(self):
+        profile = create_profile(stacks={"frames": [], "stacks": []})
+
+        response = self.client.get(
+            reverse("admin:core_requestprofile_change", args=[profile.pk])
+        )
+        self.assertContains(response, "no CPU samples")
+        response = self.client.get(
+            reverse("admin:core_requestprofile_pstats", args=[profile.pk])
+        )
+        self.assertEqual(response.status_code, 404)
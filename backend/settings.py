@@ -20,16 +20,6 @@ from decouple import config
 from dj_database_url import parse as db_url
 from corsheaders.defaults import default_headers
 
-import sentry_sdk
-from sentry_sdk.integrations.django import DjangoIntegration
-
-sentry_sdk.init(
-    dsn="http://7f276137489b428db71e1248b046e7a9@default-glitchtip-16abe2-5-78-75-130.traefik.me/2",
-    integrations=[DjangoIntegration()],
-    auto_session_tracking=False,
-    traces_sample_rate=0
-)
-
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -50,6 +40,17 @@ CSRF_TRUSTED_ORIGINS = config("CSRF_TRUSTED_ORIGINS", default="", cast=str.split
 if DEBUG:
     ALLOWED_HOSTS += ["*"]
 
+# Startup settings
+
+# when enabled, each worker runs backend.core.startup.warm_up before it starts
+# serving requests, so the first request doesn't pay for loading the urlconf and api
+STARTUP_OPTIMIZED = config("STARTUP_OPTIMIZED", default=False, cast=bool)
+
+SENTRY_DSN = config(
+    "SENTRY_DSN",
+    default="http://7f276137489b428db71e1248b046e7a9@default-glitchtip-16abe2-5-78-75-130.traefik.me/2",
+)
+
 INTERNAL_IPS = [
     "127.0.0.1",
     "localhost",
@@ -89,6 +90,7 @@ ALLAUTH_APPS = [
 INSTALLED_APPS += ALLAUTH_APPS
 
 MIDDLEWARE = [
+    "backend.core.profiling.ProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -203,6 +205,7 @@ CORS_ALLOW_CREDENTIALS = True
 CORS_ALLOW_HEADERS = (
     *default_headers,
     "x-session-token",
+    "x-profile-request",
 )
 
 # Auth settings
@@ -223,3 +226,16 @@ EMAIL_HOST_USER = config("AWS_ACCESS_KEY_ID", default="")
 EMAIL_HOST_PASSWORD = config("AWS_SECRET_ACCESS_KEY", default="")
 AWS_DEFAULT_REGION = os.environ["AWS_DEFAULT_REGION"] = config("AWS_DEFAULT_REGION", default="us-east-2")
 DEFAULT_FROM_EMAIL = "noreply@knowsuchagency.com"
+
+# Profiling settings
+
+# requests under this prefix are profiled when they carry a signed
+# X-Profile-Request header (see `manage.py profiling_token`) or are sampled
+PROFILING_PATH_PREFIX = config("PROFILING_PATH_PREFIX", default="/api/v1/")
+PROFILING_SAMPLE_RATE = config("PROFILING_SAMPLE_RATE", default=0.0, cast=float)
+PROFILING_TOKEN_MAX_AGE = config("PROFILING_TOKEN_MAX_AGE", default=60 * 60, cast=int)
+PROFILING_INTERVAL_MS = config("PROFILING_INTERVAL_MS", default=5.0, cast=float)
+# only the newest profiles are kept
+PROFILING_BUFFER_SIZE = config("PROFILING_BUFFER_SIZE", default=100, cast=int)
+# statements beyond this are counted but not stored
+PROFILING_MAX_QUERIES = config("PROFILING_MAX_QUERIES", default=500, cast=int)
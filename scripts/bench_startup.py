@@ -0,0 +1,102 @@
+"""
+Measure how long a fresh worker takes to serve its first request.
+
+Each run starts a new interpreter that imports the application and then serves
+--path with the django test client, so both modes pay for the same work whether
+it happens during the import (the warm-up) or on the first request.
+Exits non-zero when the median exceeds --max-seconds, so it can gate CI.
+
+    python scripts/bench_startup.py --runs 10 --max-seconds 2.5
+    python scripts/bench_startup.py --importtime  # slowest imports of one run
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+CHILD = """
+import {module}
+from django.test import Client
+
+Client().get({path!r})
+"""
+
+
+def run_once(module, path, env, importtime=False):
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", CHILD.format(module=module, path=path)]
+
+    start = time.perf_counter()
+    result = subprocess.run(
+        command, check=False, cwd=BASE_DIR, env=env, capture_output=True, text=True
+    )
+    elapsed = time.perf_counter() - start
+
+    if result.returncode != 0:
+        sys.exit(f"serving {path} from {module} failed:\n{result.stderr}")
+
+    return elapsed, result.stderr
+
+
+def slowest_imports(importtime_output, limit):
+    rows = []
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="backend.wsgi")
+    parser.add_argument(
+        "--path", default="/api/openapi.json", help="the first request to serve"
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=None)
+    parser.add_argument(
+        "--no-optimize", action="store_true", help="benchmark without STARTUP_OPTIMIZED"
+    )
+    parser.add_argument(
+        "--importtime", action="store_true", help="print the slowest imports of one run"
+    )
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    env = os.environ.copy()
+    env.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+    env["STARTUP_OPTIMIZED"] = "false" if args.no_optimize else "true"
+
+    if args.importtime:
+        _, output = run_once(args.module, args.path, env, importtime=True)
+        for cumulative, name in slowest_imports(output, args.top):
+            print(f"{cumulative / 1000:10.1f} ms  {name}")
+        return
+
+    timings = [run_once(args.module, args.path, env)[0] for _ in range(args.runs)]
+    median = statistics.median(timings)
+
+    print(f"module:  {args.module} (STARTUP_OPTIMIZED={env['STARTUP_OPTIMIZED']})")
+    print(f"path:    {args.path}")
+    print(f"runs:    {args.runs}")
+    print(f"median:  {median:.3f}s")
+    print(f"min/max: {min(timings):.3f}s / {max(timings):.3f}s")
+
+    if args.max_seconds is not None and median > args.max_seconds:
+        sys.exit(
+            f"startup regression: median {median:.3f}s exceeds {args.max_seconds:.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()